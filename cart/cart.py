@@ -3,54 +3,71 @@ from django.conf import settings
 from products.models import Product
 
 
+def to_kopecks(price):
+    return int(Decimal(price) * 100)
+
+
+def from_kopecks(kopecks):
+    return Decimal(kopecks).scaleb(-2)
+
+
 class Cart(object):
 
     def __init__(self, request):
         self.session = request.user_data
         cart = self.session.get(settings.CART_SESSION_ID)
         if not cart:
-            cart = self.session[settings.CART_SESSION_ID] = {}
+            cart = self.session[settings.CART_SESSION_ID] = {
+                'items': {},
+                'quantity': 0,
+                'total_price': 0,
+            }
         self.cart = cart
+        self.items = cart['items']
 
     def add(self, product, quantity=1, update_quantity=False):
-        product_id = str(product.id)
-        if product_id not in self.cart:
-            self.cart[product_id] = {'quantity': 0,
-                                    'price': str(product.price)}
+        item = self.items.setdefault(
+            product.id,
+            {'quantity': 0, 'price': to_kopecks(product.price)}
+        )
+        old_quantity = item['quantity']
         if update_quantity:
-            self.cart[product_id]['quantity'] = quantity
+            item['quantity'] = int(quantity)
         else:
-            self.cart[product_id]['quantity'] += quantity
-        self.save()
+            item['quantity'] += int(quantity)
+        self.change_totals(item, item['quantity'] - old_quantity)
 
-    def save(self):
-        self.session[settings.CART_SESSION_ID] = self.cart
-        self.session['modified'] = True
+    def change_totals(self, item, quantity_delta):
+        self.cart['quantity'] += quantity_delta
+        self.cart['total_price'] += item['price'] * quantity_delta
 
-    def remove(self, product):
-        product_id = str(product.id)
-        if product_id in self.cart:
-            del self.cart[product_id]
-            self.save()
+    def remove(self, product_id):
+        item = self.items.pop(int(product_id), None)
+        if item:
+            self.change_totals(item, -item['quantity'])
 
     def __iter__(self):
-        product_ids = self.cart.keys()
-        products = Product.objects.filter(id__in=product_ids)
-        for product in products:
-            self.cart[str(product.id)]['product'] = product
-
-        for item in self.cart.values():
-            item['price'] = Decimal(item['price'])
-            item['total_price'] = item['price'] * item['quantity']
-            yield item
+        products = Product.objects.only('id', 'name').in_bulk(
+            list(self.items))
+        for product_id, item in self.items.items():
+            product = products.get(product_id)
+            if not product:
+                continue
+            yield {
+                'product': product,
+                'quantity': item['quantity'],
+                'price': from_kopecks(item['price']),
+                'total_price': from_kopecks(item['price'] * item['quantity']),
+            }
 
     def __len__(self):
-        return sum(item['quantity'] for item in self.cart.values())
+        return self.cart['quantity']
+
+    def get_total_kopecks(self):
+        return self.cart['total_price']
 
     def get_total_price(self):
-        return sum(Decimal(item['price']) * item['quantity'] for item in
-                self.cart.values())
+        return from_kopecks(self.cart['total_price'])
 
     def clear(self):
         del self.session[settings.CART_SESSION_ID]
-        self.session['modified'] = True
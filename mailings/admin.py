@@ -1,8 +1,67 @@
 from django.contrib import admin
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    Func,
+    IntegerField,
+    Q,
+    Subquery,
+    When,
+)
+from django.db.models.functions import Greatest
 
-from mailings.models import Mailing
+from clients.models import Client
+from mailings.models import Mailing, MailingDelivery
 
 
 @admin.register(Mailing)
 class MailingAdmin(admin.ModelAdmin):
-    pass
+    list_display = (
+        '__str__',
+        'is_finish',
+        'sent_count',
+        'failed_count',
+        'pending_count',
+    )
+
+    def get_queryset(self, request):
+        clients_count = Client.objects.order_by().annotate(
+            total=Func('id', function='COUNT', output_field=IntegerField())
+        ).values('total')
+        return super().get_queryset(request).annotate(
+            sent_count=Count(
+                'deliveries',
+                filter=Q(deliveries__status=MailingDelivery.SENT)
+            ),
+            failed_count=Count(
+                'deliveries',
+                filter=Q(deliveries__status=MailingDelivery.FAILED)
+            ),
+            queued_count=Count(
+                'deliveries',
+                filter=Q(deliveries__status=MailingDelivery.PENDING)
+            ),
+            clients_count=Subquery(clients_count),
+        ).annotate(
+            pending_count=Case(
+                When(is_finish=True, then=F('queued_count')),
+                default=Greatest(
+                    F('clients_count') - F('sent_count') - F('failed_count'),
+                    0
+                ),
+                output_field=IntegerField(),
+            ),
+        )
+
+    @admin.display(description='Отправлено', ordering='sent_count')
+    def sent_count(self, mailing):
+        return mailing.sent_count
+
+    @admin.display(description='Ошибки', ordering='failed_count')
+    def failed_count(self, mailing):
+        return mailing.failed_count
+
+    @admin.display(description='Ожидают', ordering='pending_count')
+    def pending_count(self, mailing):
+        return mailing.pending_count
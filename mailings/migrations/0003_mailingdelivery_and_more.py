@@ -0,0 +1,35 @@
+# Generated by Django 4.0 on 2026-10-18 11:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailings', '0002_rename_start_mailing_start_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailingDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tg_user_id', models.BigIntegerField(verbose_name='Телеграм ID')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает'), ('sent', 'Отправлено'), ('failed', 'Ошибка')], default='pending', max_length=10, verbose_name='Статус')),
+                ('mailing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='mailings.mailing', verbose_name='Рассылка')),
+            ],
+            options={
+                'verbose_name': 'Доставка рассылки',
+                'verbose_name_plural': 'Доставки рассылок',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='mailingdelivery',
+            index=models.Index(fields=['mailing', 'status'], name='mailings_ma_mailing_d28258_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='mailingdelivery',
+            unique_together={('mailing', 'tg_user_id')},
+        ),
+    ]
@@ -12,3 +12,37 @@ class Mailing(models.Model):
 
     def __str__(self):
         return f'{self.start_date.strftime("%m-%d-%Y %H:%M")}'
+
+
+class MailingDelivery(models.Model):
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Ожидает'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Ошибка'),
+    )
+
+    mailing = models.ForeignKey(
+        Mailing,
+        on_delete=models.CASCADE,
+        verbose_name='Рассылка',
+        related_name='deliveries',
+    )
+    tg_user_id = models.BigIntegerField('Телеграм ID')
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+    )
+
+    class Meta:
+        verbose_name = 'Доставка рассылки'
+        verbose_name_plural = 'Доставки рассылок'
+        unique_together = ('mailing', 'tg_user_id')
+        indexes = [models.Index(fields=('mailing', 'status'))]
+
+    def __str__(self):
+        return f'{self.mailing} {self.tg_user_id} {self.status}'
@@ -1,4 +1,6 @@
 from django.contrib import admin
+from django.db.models import Func, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Concat, Length, Substr
 
 from .models import Category, Product, Order, OrderItem
 
@@ -7,7 +9,24 @@ from .models import Category, Product, Order, OrderItem
 class CategoryAdmin(admin.ModelAdmin):
     raw_id_fields = ('sub_category',)
 
-    list_display = ('name',)
+    list_display = ('name', 'path', 'products_count')
+    ordering = ('path',)
+
+    def get_queryset(self, request):
+        path = OuterRef('path')
+        products_count = Product.objects.filter(
+            category__path__gte=path,
+            category__path__lt=Concat(
+                Substr(path, 1, Length(path) - 1), Value('0')),
+        ).order_by().annotate(
+            total=Func('id', function='COUNT', output_field=IntegerField())
+        ).values('total')
+        return super().get_queryset(request).annotate(
+            products_count=Subquery(products_count))
+
+    @admin.display(description='Товаров в ветке', ordering='products_count')
+    def products_count(self, category):
+        return category.products_count
 
 
 @admin.register(Product)
@@ -29,6 +48,6 @@ class OrederItemTubularInline(admin.TabularInline):
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ('created_at',)
+    list_display = ('created_at', 'telegram_payment_charge_id')
 
     inlines = (OrederItemTubularInline,)
@@ -0,0 +1,18 @@
+# Generated by Django 4.0 on 2026-10-18 10:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_order_address'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='image_file_id',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Телеграм ID изображения'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0013_product_image_file_id'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=[
+                'CREATE VIRTUAL TABLE products_product_search '
+                'USING fts5(name, description, tokenize="unicode61")',
+                'INSERT INTO products_product_search '
+                '(rowid, name, description) '
+                'SELECT id, name, description FROM products_product',
+            ],
+            reverse_sql='DROP TABLE products_product_search',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0 on 2026-10-18 11:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0014_product_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='telegram_payment_charge_id',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True, verbose_name='ID платежа в Телеграме'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+
+
+def fill_paths(apps, schema_editor):
+    Category = apps.get_model('products', 'Category')
+    children = {}
+    for category_id, parent_id in Category.objects.values_list(
+            'id', 'sub_category_id'):
+        children.setdefault(parent_id, []).append(category_id)
+    changed = []
+    parents = [(None, '')]
+    while parents:
+        parent_id, parent_path = parents.pop()
+        for category_id in children.get(parent_id, []):
+            path = f'{parent_path}{category_id}/'
+            changed.append(Category(id=category_id, path=path))
+            parents.append((category_id, path))
+    Category.objects.bulk_update(changed, ['path'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0016_product_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255, verbose_name='Путь в дереве'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0 on 2026-10-18 11:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0017_category_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='image_preview',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='', verbose_name='Уменьшенное изображение'),
+        ),
+    ]
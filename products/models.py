@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q, Value
+from django.db.models.functions import Concat, Substr
 from django.utils import timezone
 from django.core.validators import MinValueValidator
 
@@ -18,6 +20,12 @@ class Category(models.Model):
         blank=True,
         null=True,
     )
+    path = models.CharField(
+        'Путь в дереве',
+        max_length=255,
+        db_index=True,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Категория'
@@ -26,6 +34,31 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            old_path = Category.objects.filter(pk=self.pk).values_list(
+                'path', flat=True).first() if self.pk else None
+            super().save(*args, **kwargs)
+            parent_path = Category.objects.filter(
+                pk=self.sub_category_id).values_list(
+                'path', flat=True).first() or ''
+            self.path = f'{parent_path}{self.pk}/'
+            if self.path == old_path:
+                return
+            Category.objects.filter(pk=self.pk).update(path=self.path)
+            if old_path:
+                Category.objects.filter(
+                    get_subtree_filter(old_path),
+                    path__gt=old_path
+                ).update(path=Concat(
+                    Value(self.path),
+                    Substr('path', len(old_path) + 1)
+                ))
+
+
+def get_subtree_filter(path):
+    return Q(path__gte=path, path__lt=path[:-1] + '0')
+
 
 class Product(models.Model):
     name = models.CharField(
@@ -54,6 +87,19 @@ class Product(models.Model):
         blank=True,
         null=True
     )
+    image_file_id = models.CharField(
+        'Телеграм ID изображения',
+        max_length=255,
+        blank=True,
+        editable=False
+    )
+    image_preview = models.ImageField(
+        'Уменьшенное изображение',
+        blank=True,
+        null=True,
+        editable=False
+    )
+    updated_at = models.DateTimeField('Когда изменён', auto_now=True)
 
     class Meta:
         verbose_name = 'Товар'
@@ -62,6 +108,21 @@ class Product(models.Model):
     def __str__(self):
         return f'{self.name} {self.category} {self.price}'
 
+    def save(self, *args, **kwargs):
+        stale_preview = None
+        if self.pk and (self.image_file_id or self.image_preview):
+            saved_image = Product.objects.filter(pk=self.pk).values_list(
+                'image', flat=True).first()
+            is_uploaded = self.image and not self.image._committed
+            if is_uploaded or saved_image != self.image.name:
+                stale_preview = self.image_preview
+                self.image_file_id = ''
+                self.image_preview = None
+        super().save(*args, **kwargs)
+        if stale_preview:
+            storage, name = stale_preview.storage, stale_preview.name
+            transaction.on_commit(lambda: storage.delete(name))
+
 
 class Order(models.Model):
     client = models.ForeignKey(
@@ -75,6 +136,13 @@ class Order(models.Model):
         default=timezone.now,
     )
     address = models.TextField('Адрес доставки', blank=True)
+    telegram_payment_charge_id = models.CharField(
+        'ID платежа в Телеграме',
+        max_length=255,
+        unique=True,
+        null=True,
+        blank=True
+    )
 
     class Meta:
         verbose_name = 'Заказ'
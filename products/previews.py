@@ -0,0 +1,73 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.db import close_old_connections
+from PIL import Image, ImageOps
+
+from products.models import Product
+
+
+PREVIEW_SIZE = (1280, 1280)
+PREVIEW_QUALITY = 85
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_preview_name(image_name):
+    return str(PurePosixPath('previews', f'{image_name}.jpg'))
+
+
+def make_preview(source_path, target_path):
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(PREVIEW_SIZE)
+        image.convert('RGB').save(
+            target_path,
+            'JPEG',
+            quality=PREVIEW_QUALITY,
+            optimize=True,
+            progressive=True
+        )
+    return target_path
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.PREVIEW_WORKERS)
+    return _executor
+
+
+def save_preview(product_id, image_name, preview_name, future):
+    try:
+        future.result()
+    except Exception:
+        logger.exception(f'Не удалось уменьшить изображение {image_name}')
+        return
+    try:
+        Product.objects.filter(id=product_id, image=image_name).update(
+            image_preview=preview_name
+        )
+    finally:
+        close_old_connections()
+
+
+def schedule_preview(product):
+    image = product.image
+    preview_name = get_preview_name(image.name)
+    future = get_executor().submit(
+        make_preview,
+        image.path,
+        image.storage.path(preview_name)
+    )
+    future.add_done_callback(
+        lambda future: save_preview(
+            product.id, image.name, preview_name, future)
+    )
@@ -0,0 +1,54 @@
+import re
+
+from django.db import connection
+
+from products.models import Product
+
+
+SEARCH_TABLE = 'products_product_search'
+
+
+def index_product(product):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [product.id])
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, name, description) '
+            'VALUES (%s, %s, %s)',
+            [product.id, product.name, product.description]
+        )
+
+
+def unindex_product(product_id):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [product_id])
+
+
+def rebuild_index():
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, name, description) '
+            'SELECT id, name, description FROM products_product'
+        )
+
+
+def build_match_query(text):
+    words = re.findall(r'\w+', text)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_products(text, offset=0, limit=20):
+    match_query = build_match_query(text)
+    if not match_query:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s ORDER BY rank LIMIT %s OFFSET %s',
+            [match_query, limit, offset]
+        )
+        product_ids = [row[0] for row in cursor.fetchall()]
+    products = Product.objects.in_bulk(product_ids)
+    return [products[id] for id in product_ids if id in products]
@@ -0,0 +1,23 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from products.models import Product
+from products.previews import schedule_preview
+from products.search import index_product, unindex_product
+
+
+@receiver(post_save, sender=Product)
+def update_search_index(sender, instance, **kwargs):
+    index_product(instance)
+
+
+@receiver(post_delete, sender=Product)
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_product(instance.id)
+
+
+@receiver(post_save, sender=Product)
+def make_image_preview(sender, instance, **kwargs):
+    if instance.image and not instance.image_preview:
+        transaction.on_commit(lambda: schedule_preview(instance))
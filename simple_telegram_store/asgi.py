@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'simple_telegram_store.settings')
 
 application = get_asgi_application()
+
+if settings.TG_WEBHOOK_URL:
+    from tgbot.webhook import with_bot_lifespan
+
+    application = with_bot_lifespan(application)
@@ -20,18 +20,35 @@ env.read_env()
 
 TG_TOKEN = env('TG_TOKEN')
 TG_CHAT_ID = env('TG_CHAT_ID')
+TG_WEBHOOK_URL = env('TG_WEBHOOK_URL', '')
+TG_WEBHOOK_SECRET = env('TG_WEBHOOK_SECRET', '')
+METRICS_TOKEN = env('METRICS_TOKEN', '')
 SUBSCRIPTION_CHANNEL_ID = env('SUBSCRIPTION_CHANNEL_ID')
 SUBSCRIPTION_CHANNEL_LINK = env('SUBSCRIPTION_CHANNEL_LINK')
+SUBSCRIPTION_MEMBER_TTL = env.int('SUBSCRIPTION_MEMBER_TTL', 3600)
+SUBSCRIPTION_NON_MEMBER_TTL = env.int('SUBSCRIPTION_NON_MEMBER_TTL', 30)
 
 PAYMENT_TOKEN = env('STRIPE_SECRET_TOKEN')
 
+MAILING_CONCURRENCY = env.int('MAILING_CONCURRENCY', 20)
+MAILING_RATE_LIMIT = env.int('MAILING_RATE_LIMIT', 25)
+BOT_API_RATE_LIMIT = env.int('BOT_API_RATE_LIMIT', 30)
+CATALOG_REFRESH_INTERVAL = env.int('CATALOG_REFRESH_INTERVAL', 300)
+MAILING_SYNC_INTERVAL = env.int('MAILING_SYNC_INTERVAL', 60)
+PERSISTENCE_UPDATE_INTERVAL = env.int('PERSISTENCE_UPDATE_INTERVAL', 30)
+PRODUCTS_PER_PAGE = max(1, min(env.int('PRODUCTS_PER_PAGE', 5), 10))
+UPDATE_CONCURRENCY = env.int('UPDATE_CONCURRENCY', 16)
+DB_READ_POOL_SIZE = env.int('DB_READ_POOL_SIZE', 4)
+SQLITE_BUSY_TIMEOUT = env.int('SQLITE_BUSY_TIMEOUT', 5000)
+PREVIEW_WORKERS = env.int('PREVIEW_WORKERS', 2)
+
 CART_SESSION_ID = 'cart'
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-ORDERS_FILE_PATH = Path(BASE_DIR) / 'orders.xlsx'
+ORDERS_FILE_PATH = Path(BASE_DIR) / 'orders.csv'
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.0/howto/deployment/checklist/
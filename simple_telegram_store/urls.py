@@ -18,6 +18,12 @@ from django.urls import path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from tgbot.views import metrics, telegram_webhook
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('telegram/webhook/', telegram_webhook, name='telegram_webhook'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+if settings.TG_WEBHOOK_URL:
+    urlpatterns.append(path('metrics/', metrics, name='metrics'))
@@ -0,0 +1,32 @@
+import asyncio
+import time
+import weakref
+
+from django.conf import settings
+from telegram import Update
+from telegram.ext import Application
+
+from tgbot.metrics import update_wait
+
+
+class StoreApplication(Application):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user_locks = weakref.WeakValueDictionary()
+        self.handler_semaphore = asyncio.Semaphore(
+            settings.UPDATE_CONCURRENCY)
+
+    async def process_update(self, update):
+        queued_at = time.monotonic()
+        user = update.effective_user if isinstance(update, Update) else None
+        if not user:
+            return await self.process_limited(update, queued_at)
+        lock = self.user_locks.setdefault(user.id, asyncio.Lock())
+        async with lock:
+            await self.process_limited(update, queued_at)
+
+    async def process_limited(self, update, queued_at):
+        async with self.handler_semaphore:
+            update_wait.observe('update', time.monotonic() - queued_at)
+            await super().process_update(update)
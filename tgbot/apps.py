@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TgbotConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tgbot'
+
+    def ready(self):
+        from tgbot import signals  # noqa: F401
@@ -0,0 +1,263 @@
+import json
+import math
+import time
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from telegram import Update
+from telegram.request import BaseRequest
+
+from products.models import Category, Order, Product
+
+
+BOT_USER = {
+    'id': 1,
+    'is_bot': True,
+    'first_name': 'Магазин',
+    'username': 'store_bot',
+}
+
+
+class RecordingRequest(BaseRequest):
+
+    def __init__(self):
+        self.calls = []
+        self.message_id = 0
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, **kwargs):
+        endpoint = url.rsplit('/', 1)[-1]
+        parameters = request_data.parameters if request_data else {}
+        self.calls.append((endpoint, parameters))
+        result = self.build_result(endpoint, parameters)
+        return 200, json.dumps({'ok': True, 'result': result}).encode()
+
+    def build_message(self, parameters, with_photo=False):
+        self.message_id += 1
+        message = {
+            'message_id': self.message_id,
+            'date': int(time.time()),
+            'chat': {'id': parameters.get('chat_id', 0), 'type': 'private'},
+        }
+        if with_photo:
+            message['photo'] = [{
+                'file_id': f'photo-{self.message_id}',
+                'file_unique_id': f'unique-{self.message_id}',
+                'width': 1280,
+                'height': 1280,
+            }]
+        return message
+
+    def build_result(self, endpoint, parameters):
+        if endpoint == 'getMe':
+            return BOT_USER
+        if endpoint == 'getChatMember':
+            return {
+                'status': 'member',
+                'user': {
+                    'id': parameters['user_id'],
+                    'is_bot': False,
+                    'first_name': 'Покупатель',
+                },
+            }
+        if endpoint == 'sendMediaGroup':
+            return [
+                self.build_message(parameters, with_photo=True)
+                for _ in parameters['media']
+            ]
+        if endpoint == 'sendPhoto':
+            return self.build_message(parameters, with_photo=True)
+        if endpoint in ('sendMessage', 'sendInvoice', 'editMessageText'):
+            return self.build_message(parameters)
+        return True
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def install(self):
+        for db_connection in connections.all():
+            db_connection.execute_wrappers.insert(0, self)
+        connection_created.connect(self.add_to_connection)
+
+    def add_to_connection(self, sender, connection, **kwargs):
+        connection.execute_wrappers.insert(0, self)
+
+
+def create_file_test_db(directory):
+    connection.settings_dict['TEST']['NAME'] = str(directory / 'bench.sqlite3')
+    return connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+
+class Shopper:
+
+    def __init__(self, bot, user_id):
+        self.bot = bot
+        self.update_id = user_id * 1000
+        self.user = {
+            'id': user_id,
+            'is_bot': False,
+            'first_name': f'Покупатель {user_id}',
+        }
+        self.chat = {'id': user_id, 'type': 'private'}
+
+    def next_update(self, **kwargs):
+        self.update_id += 1
+        return Update.de_json(
+            {'update_id': self.update_id, **kwargs},
+            self.bot
+        )
+
+    def build_message(self, **kwargs):
+        return {
+            'message_id': self.update_id,
+            'date': int(time.time()),
+            'chat': self.chat,
+            'from': self.user,
+            **kwargs
+        }
+
+    def message(self, text=None, **kwargs):
+        return self.next_update(
+            message=self.build_message(text=text, **kwargs))
+
+    def command(self, command):
+        return self.message(
+            text=command,
+            entities=[
+                {'type': 'bot_command', 'offset': 0, 'length': len(command)}
+            ]
+        )
+
+    def callback(self, data):
+        return self.next_update(callback_query={
+            'id': str(self.update_id),
+            'from': self.user,
+            'chat_instance': 'benchmark',
+            'message': self.build_message(),
+            'data': str(data),
+        })
+
+    def pre_checkout(self, total_amount):
+        return self.next_update(pre_checkout_query={
+            'id': str(self.update_id),
+            'from': self.user,
+            'currency': 'RUB',
+            'total_amount': total_amount,
+            'invoice_payload': 'telegram-store',
+        })
+
+    def payment(self, total_amount):
+        return self.message(successful_payment={
+            'currency': 'RUB',
+            'total_amount': total_amount,
+            'invoice_payload': 'telegram-store',
+            'telegram_payment_charge_id': f'charge-{self.update_id}',
+            'provider_payment_charge_id': f'provider-{self.update_id}',
+        })
+
+
+def create_catalog(products_count):
+    super_category = Category.objects.create(name='Электроника')
+    category = Category.objects.create(
+        name='Смартфоны',
+        sub_category=super_category
+    )
+    Product.objects.bulk_create(
+        Product(
+            name=f'Смартфон {number}',
+            description='Смартфон для тестов',
+            price=1000 + number,
+            category=category
+        ) for number in range(products_count)
+    )
+    product = Product.objects.filter(category=category).first()
+    return super_category, category, product
+
+
+def checkout_flow(shopper, catalog):
+    super_category, category, product = catalog
+    price = int(product.price * 2 * 100)
+    return [
+        ('start', shopper.command('/start')),
+        ('handle_categories', shopper.callback('catalog')),
+        ('handle_sub_categories', shopper.callback(super_category.id)),
+        ('handle_products', shopper.callback(category.id)),
+        ('handle_product_detail', shopper.callback(product.id)),
+        ('check_quantity', shopper.message('2')),
+        ('add_cart', shopper.callback('Подтвердить')),
+        ('handle_cart', shopper.callback('Корзина')),
+        ('add_delivery_address', shopper.callback('delivery_address')),
+        ('check_address_text', shopper.message('Москва, ул. Тестовая, 1')),
+        ('save_customer', shopper.callback('Верно')),
+        ('handle_user_payment', shopper.callback('Оплатить')),
+        ('precheckout_callback', shopper.pre_checkout(price)),
+        ('successful_payment_callback', shopper.payment(price)),
+    ]
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = max(math.ceil(percent / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+async def run_benchmark(application, request, shoppers_count, products_count):
+    query_counter = QueryCounter()
+    query_counter.install()
+    catalog = await sync_to_async(create_catalog)(products_count)
+    timings = defaultdict(list)
+    queries = defaultdict(list)
+    api_calls = defaultdict(list)
+    errors = []
+
+    async def collect_error(update, context):
+        errors.append(repr(context.error))
+
+    application.add_error_handler(collect_error)
+    await application.initialize()
+    await application.start()
+    try:
+        for user_id in range(1, shoppers_count + 1):
+            shopper = Shopper(application.bot, user_id)
+            for handler_name, update in checkout_flow(shopper, catalog):
+                queries_before = query_counter.count
+                calls_before = len(request.calls)
+                started_at = time.perf_counter()
+                await application.process_update(update)
+                timings[handler_name].append(
+                    (time.perf_counter() - started_at) * 1000)
+                queries[handler_name].append(
+                    query_counter.count - queries_before)
+                api_calls[handler_name].append(
+                    len(request.calls) - calls_before)
+    finally:
+        await application.stop()
+        await application.shutdown()
+    results = {
+        handler_name: {
+            'p50': percentile(values, 50),
+            'p95': percentile(values, 95),
+            'p99': percentile(values, 99),
+            'queries': max(queries[handler_name]),
+            'api_calls': max(api_calls[handler_name]),
+        } for handler_name, values in timings.items()
+    }
+    orders_count = await sync_to_async(Order.objects.count)()
+    if orders_count != shoppers_count:
+        errors.append(
+            f'Создано заказов {orders_count} из {shoppers_count}')
+    return results, errors
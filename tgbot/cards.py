@@ -0,0 +1,67 @@
+import textwrap as tw
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+from telegram import InlineKeyboardButton
+
+
+CARD_CACHE_SIZE = 1024
+
+
+class ProductCard(NamedTuple):
+    detail: str
+    title: str
+    button: InlineKeyboardButton
+
+
+_cards = OrderedDict()
+_versions = {}
+_lock = threading.Lock()
+
+
+def render_card(product):
+    detail = tw.dedent(f'''
+    <b>{product.name}</b>
+    <i>{product.description}</i>
+    Цена <b>{product.price}</b> руб.
+    ''')
+    title = tw.dedent(f'''
+    <b>{product.name}</b>
+    цена <b>{product.price}</b>
+    ''')
+    button = InlineKeyboardButton(
+        f'🛒 {product.name}', callback_data=product.id)
+    return ProductCard(detail, title, button)
+
+
+def get_card(product):
+    key = (product.id, product.updated_at)
+    with _lock:
+        card = _cards.get(key)
+        if card:
+            _cards.move_to_end(key)
+            _versions[product.id] = product.updated_at
+            return card
+    card = render_card(product)
+    with _lock:
+        _cards[key] = card
+        _versions[product.id] = product.updated_at
+        while len(_cards) > CARD_CACHE_SIZE:
+            _cards.popitem(last=False)
+    return card
+
+
+def get_cached_card(product_id):
+    product_id = int(product_id)
+    with _lock:
+        key = (product_id, _versions.get(product_id))
+        card = _cards.get(key)
+        if card:
+            _cards.move_to_end(key)
+        return card
+
+
+def forget_product(product_id):
+    with _lock:
+        _versions.pop(product_id, None)
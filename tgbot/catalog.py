@@ -0,0 +1,37 @@
+from collections import defaultdict
+from typing import NamedTuple, Optional
+
+from products.models import Category
+
+
+class CategoryNode(NamedTuple):
+    id: int
+    name: str
+    parent_id: Optional[int]
+
+
+_children = {}
+_version = 0
+
+
+def load_categories():
+    global _children, _version
+    children = defaultdict(list)
+    categories = Category.objects.order_by('id').values_list(
+        'id', 'name', 'sub_category_id')
+    for category_id, name, parent_id in categories:
+        children[parent_id].append(CategoryNode(category_id, name, parent_id))
+    _children = {
+        parent_id: tuple(nodes) for parent_id, nodes in children.items()
+    }
+    _version += 1
+
+
+def get_version():
+    return _version
+
+
+def get_children(parent_id=None):
+    if parent_id is not None:
+        parent_id = int(parent_id)
+    return _children.get(parent_id, ())
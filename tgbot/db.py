@@ -0,0 +1,24 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+
+read_executor = ThreadPoolExecutor(
+    max_workers=settings.DB_READ_POOL_SIZE,
+    thread_name_prefix='db-read'
+)
+write_executor = ThreadPoolExecutor(
+    max_workers=1,
+    thread_name_prefix='db-write'
+)
+
+
+def db_read(function):
+    return sync_to_async(
+        function, thread_sensitive=False, executor=read_executor)
+
+
+def db_write(function):
+    return sync_to_async(
+        function, thread_sensitive=False, executor=write_executor)
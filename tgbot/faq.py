@@ -0,0 +1,110 @@
+import re
+
+from telegram.constants import MessageLimit
+
+from faq.models import FAQ
+
+
+FAQ_TITLE = '<b>Часто задаваемые вопросы</b>'
+PAGE_NUMBER_RESERVE = 16
+PAGE_LENGTH = MessageLimit.MAX_TEXT_LENGTH - len(FAQ_TITLE) - \
+    PAGE_NUMBER_RESERVE
+QUESTION_LENGTH = 512
+HTML_TOKEN = re.compile(r'<[^<>]*>|&#?\w+;|\s+|[^<&\s]+|[<&]')
+
+_pages = (FAQ_TITLE,)
+
+
+def close_tags(open_tags):
+    return ''.join(f'</{name}>' for name, _ in reversed(open_tags))
+
+
+def reopen_tags(open_tags):
+    return ''.join(tag for _, tag in open_tags)
+
+
+def update_tags(open_tags, token):
+    if token.startswith('</'):
+        name = token[2:-1].strip().lower()
+        names = [open_name for open_name, _ in open_tags]
+        if name in names:
+            index = len(names) - 1 - names[::-1].index(name)
+            return open_tags[:index]
+    elif token.startswith('<') and len(token) > 1:
+        name = token[1:-1].split(maxsplit=1)[0].lower()
+        return open_tags + [(name, token)]
+    return open_tags
+
+
+def split_html(text, limit):
+    chunks = []
+    chunk = ''
+    open_tags = []
+    for token in HTML_TOKEN.findall(text):
+        tags = update_tags(open_tags, token)
+        size = len(chunk) + len(token) + len(close_tags(tags))
+        if size > limit and chunk != reopen_tags(open_tags):
+            chunks.append(chunk + close_tags(open_tags))
+            chunk = reopen_tags(open_tags)
+            if token.isspace():
+                continue
+        if tags is open_tags and not token.isspace():
+            room = limit - len(chunk) - len(close_tags(open_tags))
+            while len(token) > room > 0:
+                chunks.append(chunk + token[:room] + close_tags(open_tags))
+                chunk = reopen_tags(open_tags)
+                token = token[room:]
+        chunk += token
+        open_tags = tags
+    if chunk or not chunks:
+        chunks.append(chunk + close_tags(open_tags))
+    return chunks
+
+
+def render_entry(number, question, answer):
+    question_chunks = split_html(question, QUESTION_LENGTH)
+    question = question_chunks[0]
+    if len(question_chunks) > 1:
+        question += '…'
+    question_text = f'\n<b>№{number} {question}</b>\n'
+    entry = f'{question_text}<i>{answer}</i>\n'
+    if len(entry) <= PAGE_LENGTH:
+        return [entry]
+    answer_length = PAGE_LENGTH - len(question_text) - len('<i></i>\n')
+    return [
+        f'{question_text}<i>{chunk}</i>\n'
+        for chunk in split_html(answer, answer_length)
+    ]
+
+
+def split_pages(entries):
+    pages = []
+    page = ''
+    for entry in entries:
+        if page and len(page) + len(entry) > PAGE_LENGTH:
+            pages.append(page)
+            page = ''
+        page += entry
+    if page or not pages:
+        pages.append(page)
+    return pages
+
+
+def load_faq():
+    global _pages
+    entries = []
+    all_faq = FAQ.objects.order_by('id').values_list('question', 'answer')
+    for number, (question, answer) in enumerate(all_faq, start=1):
+        entries.extend(render_entry(number, question, answer))
+    pages = split_pages(entries)
+    if len(pages) == 1:
+        _pages = (f'{FAQ_TITLE}\n{pages[0]}',)
+        return
+    _pages = tuple(
+        f'{FAQ_TITLE} ({number}/{len(pages)})\n{page}'
+        for number, page in enumerate(pages, start=1)
+    )
+
+
+def get_faq_pages():
+    return _pages
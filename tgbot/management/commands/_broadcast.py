@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import time
+from collections import Counter
+
+from telegram.constants import ParseMode
+from telegram.error import (
+    BadRequest,
+    Forbidden,
+    NetworkError,
+    RetryAfter,
+)
+
+from tgbot.outbound import BROADCAST
+
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+PROGRESS_STEP = 500
+
+
+class RateLimiter:
+
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self.next_slot = 0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            loop = asyncio.get_running_loop()
+            delay = self.next_slot - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.next_slot = max(self.next_slot, loop.time()) + self.interval
+
+    def pause(self, seconds):
+        loop = asyncio.get_running_loop()
+        self.next_slot = max(self.next_slot, loop.time() + seconds)
+
+
+async def send_with_retry(bot, limiter, chat_id, text):
+    for _ in range(MAX_ATTEMPTS):
+        await limiter.acquire()
+        try:
+            await bot.send_message(
+                text=text,
+                chat_id=chat_id,
+                parse_mode=ParseMode.HTML,
+                rate_limit_args=BROADCAST
+            )
+            return 'sent'
+        except RetryAfter as error:
+            logger.warning(
+                f'Flood control, пауза {error.retry_after} сек.')
+            limiter.pause(error.retry_after)
+        except (Forbidden, BadRequest) as error:
+            logger.info(f'Не доставлено {chat_id}: {error}')
+            return 'failed'
+        except NetworkError as error:
+            logger.warning(f'Сетевая ошибка {chat_id}: {error}')
+            await asyncio.sleep(1)
+    return 'failed'
+
+
+async def broadcast(bot, chat_ids, text, concurrency, rate, on_result=None):
+    limiter = RateLimiter(rate)
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    stats = Counter()
+    started_at = time.monotonic()
+
+    async def worker():
+        while True:
+            chat_id = await queue.get()
+            try:
+                result = await send_with_retry(bot, limiter, chat_id, text)
+            except Exception as error:
+                logger.error(f'Не доставлено {chat_id}: {error}')
+                result = 'failed'
+            stats[result] += 1
+            try:
+                if on_result:
+                    await on_result(chat_id, result)
+            except Exception as error:
+                logger.error(f'Не удалось сохранить результат {chat_id}: {error}')
+            finally:
+                queue.task_done()
+            done = stats['sent'] + stats['failed']
+            if done % PROGRESS_STEP == 0:
+                elapsed = time.monotonic() - started_at
+                logger.info(
+                    f'Рассылка: отправлено {stats["sent"]}, '
+                    f'ошибок {stats["failed"]}, '
+                    f'{done / elapsed:.1f} сообщ./сек.'
+                )
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        async for chat_id in chat_ids:
+            await queue.put(chat_id)
+        await queue.join()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    logger.info(
+        f'Рассылка завершена за {time.monotonic() - started_at:.1f} сек.: '
+        f'отправлено {stats["sent"]}, ошибок {stats["failed"]}'
+    )
+    return stats
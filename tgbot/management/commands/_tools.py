@@ -1,12 +1,12 @@
+import asyncio
+import csv
+import os
 import textwrap as tw
 
-from django.utils import timezone
 from django.conf import settings
-import xlsxwriter
-from asgiref.sync import sync_to_async
+from django.db import transaction
 
-from faq.models import FAQ
-from mailings.models import Mailing
+from mailings.models import Mailing, MailingDelivery
 from clients.models import Client
 from products.models import (
     Category,
@@ -14,16 +14,26 @@ from products.models import (
     Order,
     OrderItem
 )
+from products.search import search_products
 from cart.cart import Cart
+from tgbot.cards import get_cached_card, get_card
+from tgbot.catalog import get_children
+from tgbot.db import db_read, db_write
+from tgbot.metrics import track_db
+from tgbot.models import ExportMark
 
 
-@sync_to_async
-def get_clients():
-    clients = Client.objects.all()
-    return [client.tg_user_id for client in clients]
+ORDERS_EXPORT_NAME = 'orders'
+ORDERS_EXPORT_HEADER = ('ID заказа', 'Телеграм ID', 'Дата', 'Адрес')
+EXPORT_CHUNK_SIZE = 1000
+DELIVERY_CHUNK_SIZE = 1000
 
+export_lock = asyncio.Lock()
+_written_order_id = None
 
-@sync_to_async
+
+@db_write
+@track_db
 def create_client(tg_user_id, first_name):
     client = Client.objects.get_or_create(
         tg_user_id=tg_user_id,
@@ -32,43 +42,60 @@ def create_client(tg_user_id, first_name):
     return client
 
 
-@sync_to_async
 def get_catigories(super_category=None):
-    categories = Category.objects.filter(sub_category=super_category)
-    return [category for category in categories]
+    return get_children(super_category)
 
 
-@sync_to_async
+@db_read
+@track_db
 def get_category(category_id):
     category = Category.objects.get(id=category_id)
     return category
 
 
-@sync_to_async
-def get_products(category_id):
-    products = Product.objects.select_related(
-        'category').filter(category=category_id)
-    return [product for product in products]
+@db_read
+@track_db
+def get_products(category_id, last_product_id=0, limit=10):
+    products = list(
+        Product.objects.filter(
+            category=category_id,
+            id__gt=last_product_id
+        ).order_by('id')[:limit + 1]
+    )
+    return products[:limit], len(products) > limit
+
+
+@db_write
+@track_db
+def save_image_file_id(product, file_id):
+    Product.objects.filter(id=product.id, image=product.image.name).update(
+        image_file_id=file_id
+    )
+
+
+@db_read
+@track_db
+def find_products(text, offset, limit):
+    return search_products(text, offset, limit)
 
 
 def get_product_detail(product):
-    return tw.dedent(f'''
-    <b>{product.name}</b>
-    <i>{product.description}</i>
-    Цена <b>{product.price}</b> руб.
-    ''')
+    return get_card(product).detail
 
 
-@sync_to_async
-def get_product_name(product_id):
-    product = Product.objects.get(id=product_id)
-    return tw.dedent(f'''
-    <b>{product.name}</b>
-    цена <b>{product.price}</b>
-    ''')
+@db_read
+@track_db
+def get_product_card(product_id):
+    return get_card(Product.objects.get(id=product_id))
+
+
+async def get_product_name(product_id):
+    card = get_cached_card(product_id) or await get_product_card(product_id)
+    return card.title
 
 
-@sync_to_async
+@db_read
+@track_db
 def add_product_to_cart(context):
     product_id = context.user_data['product_id']
     quantity = int(context.user_data['quantity'])
@@ -81,12 +108,10 @@ def add_product_to_cart(context):
     <b>{quantity} шт. {product.name}</b>''')
 
 
-@sync_to_async
 def remove_product_from_cart(context):
     product_id = context.user_data['product_id']
-    product = Product.objects.get(id=product_id)
     cart = Cart(context)
-    cart.remove(product)
+    cart.remove(product_id)
 
 
 def get_cart_info(context):
@@ -94,7 +119,8 @@ def get_cart_info(context):
     return cart
 
 
-@sync_to_async
+@db_read
+@track_db
 def get_cart_products_info(context):
     cart = Cart(context)
     products = []
@@ -118,7 +144,8 @@ def get_cart_products_info(context):
     return products_info, products
 
 
-@sync_to_async
+@db_read
+@track_db
 def get_product_info_for_payment(context):
     products_in_cart = get_cart_info(context)
     total_order_price = products_in_cart.get_total_price()
@@ -136,84 +163,177 @@ def get_product_info_for_payment(context):
     ''')
     return {
         'products_info': products_info,
-        'total_order_price': total_order_price
+        'total_order_price': total_order_price,
+        'total_order_kopecks': products_in_cart.get_total_kopecks()
     }
 
 
-@sync_to_async
-def create_order(context):
+@db_write
+@track_db
+@transaction.atomic
+def create_order(context, payment_charge_id):
     cart = Cart(context)
     address = context.user_data['address']
     tg_user_id = context.user_data['tg_user_id']
-    client = Client.objects.get(tg_user_id=tg_user_id)
-    order = Order.objects.create(
-        client=client,
-        address=address,
+    client = Client.objects.only('id').get(tg_user_id=tg_user_id)
+    order, created = Order.objects.get_or_create(
+        telegram_payment_charge_id=payment_charge_id,
+        defaults={
+            'client': client,
+            'address': address,
+        }
     )
-    order_elements = []
-    for order_product in cart:
-        product = order_product['product']
-        quantity = order_product['quantity']
-        order_element = OrderItem(
+    if not created:
+        return False
+    order_elements = [
+        OrderItem(
             order=order,
-            product=product,
-            quantity=quantity,
-        )
-        order_elements.append(order_element)
+            product=order_product['product'],
+            quantity=order_product['quantity'],
+        ) for order_product in cart
+    ]
     OrderItem.objects.bulk_create(order_elements)
 
     return True
 
 
-@sync_to_async
-def upload_to_exel():
-    orders = Order.objects.select_related('client')
-    filepath = settings.ORDERS_FILE_PATH
-    workbook = xlsxwriter.Workbook(filepath)
-    worksheet = workbook.add_worksheet()
-
-    bold = workbook.add_format({'bold': True})
+@db_read
+@track_db
+def get_export_mark():
+    mark = ExportMark.objects.filter(name=ORDERS_EXPORT_NAME).first()
+    return mark.last_id if mark else 0
 
-    expenses = [
-        [order.client.tg_user_id,
-         order.created_at.strftime('%m/%d/%Y'),
-         order.address]for order in orders]
 
-    for row_num, row_data in enumerate(expenses):
-        worksheet.write_row(row_num, 0, row_data)
-    workbook.close()
+@db_read
+@track_db
+def get_orders_chunk(last_id, limit):
+    orders = Order.objects.filter(id__gt=last_id).order_by(
+        'id').values_list(
+        'id', 'client__tg_user_id', 'created_at', 'address')[:limit]
+    return list(orders)
 
 
-@sync_to_async
-def get_mailing():
-    current_mailings = Mailing.objects.filter(
-        start_date__lte=timezone.now(),
-        is_finish=False,
+@db_write
+@track_db
+def save_export_mark(last_id):
+    ExportMark.objects.update_or_create(
+        name=ORDERS_EXPORT_NAME,
+        defaults={'last_id': last_id}
     )
-    return [mailing for mailing in current_mailings]
 
 
-@sync_to_async
+def get_written_order_id():
+    global _written_order_id
+    if _written_order_id is None:
+        _written_order_id = 0
+        filepath = settings.ORDERS_FILE_PATH
+        if os.path.exists(filepath):
+            with open(filepath, newline='', encoding='utf-8-sig') as file:
+                for row in csv.reader(file):
+                    if row and row[0].isdigit():
+                        _written_order_id = int(row[0])
+    return _written_order_id
+
+
+def write_orders(orders):
+    global _written_order_id
+    written_id = get_written_order_id()
+    orders = [order for order in orders if order[0] > written_id]
+    if not orders:
+        return
+    filepath = settings.ORDERS_FILE_PATH
+    with open(filepath, 'a', newline='', encoding='utf-8-sig') as file:
+        writer = csv.writer(file)
+        if file.tell() == 0:
+            writer.writerow(ORDERS_EXPORT_HEADER)
+        for order_id, tg_user_id, created_at, address in orders:
+            writer.writerow([
+                order_id,
+                tg_user_id,
+                created_at.strftime('%m/%d/%Y'),
+                address
+            ])
+        file.flush()
+        os.fsync(file.fileno())
+    _written_order_id = orders[-1][0]
+
+
+async def export_new_orders():
+    async with export_lock:
+        last_id = await get_export_mark()
+        while True:
+            orders = await get_orders_chunk(last_id, EXPORT_CHUNK_SIZE)
+            if not orders:
+                return
+            await asyncio.to_thread(write_orders, orders)
+            last_id = orders[-1][0]
+            await save_export_mark(last_id)
+
+
+@db_read
+@track_db
+def get_mailing(mailing_id):
+    return Mailing.objects.filter(id=mailing_id, is_finish=False).first()
+
+
+@db_read
+@track_db
+def get_unfinished_mailings():
+    mailings = Mailing.objects.filter(is_finish=False).values_list(
+        'id', 'start_date')
+    return list(mailings)
+
+
+@db_write
+@track_db
+def get_recipients_chunk(mailing, last_client_id, limit):
+    clients = list(
+        Client.objects.filter(id__gt=last_client_id).order_by(
+            'id').values_list('id', 'tg_user_id')[:limit]
+    )
+    if not clients:
+        return None, []
+    tg_user_ids = [tg_user_id for _, tg_user_id in clients]
+    MailingDelivery.objects.bulk_create(
+        (
+            MailingDelivery(mailing=mailing, tg_user_id=tg_user_id)
+            for tg_user_id in tg_user_ids
+        ),
+        ignore_conflicts=True
+    )
+    pending = MailingDelivery.objects.filter(
+        mailing=mailing,
+        status=MailingDelivery.PENDING,
+        tg_user_id__in=tg_user_ids
+    ).values_list('tg_user_id', flat=True)
+    return clients[-1][0], list(pending)
+
+
+async def iter_recipients(mailing):
+    last_client_id = 0
+    while last_client_id is not None:
+        last_client_id, tg_user_ids = await get_recipients_chunk(
+            mailing, last_client_id, DELIVERY_CHUNK_SIZE)
+        for tg_user_id in tg_user_ids:
+            yield tg_user_id
+
+
+@db_write
+@track_db
+def save_deliveries(mailing, status, tg_user_ids):
+    MailingDelivery.objects.filter(
+        mailing=mailing,
+        tg_user_id__in=tg_user_ids
+    ).update(status=status)
+
+
+@db_write
+@track_db
 def change_status_mailing(mailing):
     mailing.is_finish = True
     mailing.save()
 
 
-@sync_to_async
-def get_text_faq():
-    all_faq = FAQ.objects.all()
-    text_faq = ''
-    for num, faq in enumerate(all_faq, start=1):
-        question = faq.question
-        answer = faq.answer
-        text_faq += tw.dedent(f'''
-        <b>№{num} {question}</b>
-        <i>{answer}</i>
-        '''
-        )
-    return text_faq
-
-
 def build_menu(buttons, n_cols,
                header_buttons=None,
                footer_buttons=None):
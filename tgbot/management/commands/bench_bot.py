@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import tempfile
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from tgbot.benchmark import (
+    create_file_test_db,
+    RecordingRequest,
+    run_benchmark,
+)
+from .telegram_bot import build_application
+
+
+BENCH_API_RATE_LIMIT = 1000000
+
+
+class Command(BaseCommand):
+    help = 'Benchmark bot handlers on a test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shoppers', type=int, default=50)
+        parser.add_argument('--products', type=int, default=30)
+        parser.add_argument(
+            '--max-p95',
+            type=float,
+            help='Допустимое p95 обработчика, мс'
+        )
+        parser.add_argument(
+            '--max-queries',
+            type=int,
+            help='Допустимое число запросов к базе на одно обновление'
+        )
+
+    def handle(self, *args, **options):
+        logging.disable(logging.WARNING)
+        with tempfile.TemporaryDirectory() as directory:
+            directory = Path(directory)
+            old_name = create_file_test_db(directory)
+            try:
+                with override_settings(
+                        ORDERS_FILE_PATH=directory / 'orders.csv',
+                        BOT_API_RATE_LIMIT=BENCH_API_RATE_LIMIT):
+                    results, errors = asyncio.run(self.run(options))
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                logging.disable(logging.NOTSET)
+        self.report(results)
+        if errors:
+            raise CommandError('\n'.join(errors))
+        self.check_thresholds(results, options)
+
+    async def run(self, options):
+        request = RecordingRequest()
+        application = build_application(request=request)
+        return await run_benchmark(
+            application,
+            request,
+            options['shoppers'],
+            options['products']
+        )
+
+    def report(self, results):
+        self.stdout.write(
+            f'{"Обработчик":<30}{"p50":>9}{"p95":>9}{"p99":>9}'
+            f'{"SQL":>6}{"API":>6}'
+        )
+        for handler_name, result in results.items():
+            self.stdout.write(
+                f'{handler_name:<30}'
+                f'{result["p50"]:>9.2f}{result["p95"]:>9.2f}'
+                f'{result["p99"]:>9.2f}'
+                f'{result["queries"]:>6}{result["api_calls"]:>6}'
+            )
+
+    def check_thresholds(self, results, options):
+        errors = []
+        for handler_name, result in results.items():
+            if options['max_p95'] and result['p95'] > options['max_p95']:
+                errors.append(
+                    f'{handler_name}: p95 {result["p95"]:.2f} мс '
+                    f'> {options["max_p95"]} мс'
+                )
+            if options['max_queries'] is not None and \
+                    result['queries'] > options['max_queries']:
+                errors.append(
+                    f'{handler_name}: {result["queries"]} запросов '
+                    f'> {options["max_queries"]}'
+                )
+        if errors:
+            raise CommandError('\n'.join(errors))
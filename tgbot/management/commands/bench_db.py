@@ -0,0 +1,80 @@
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from products.models import Category, Product
+from tgbot.benchmark import create_file_test_db
+from tgbot.db import db_read
+
+
+def create_products(categories_count, products_count):
+    categories = Category.objects.bulk_create(
+        Category(name=f'Категория {number}')
+        for number in range(categories_count)
+    )
+    Product.objects.bulk_create(
+        Product(
+            name=f'Товар {number}',
+            description='Товар для замера',
+            price=number % 1000 + 1,
+            category=categories[number % categories_count]
+        ) for number in range(products_count)
+    )
+    return [category.id for category in categories]
+
+
+def read_page(category_id):
+    return list(
+        Product.objects.filter(category=category_id).order_by('-price')[:10]
+    )
+
+
+async def measure(run_in_thread, category_ids, calls, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    read = run_in_thread(read_page)
+
+    async def call(number):
+        async with semaphore:
+            await read(category_ids[number % len(category_ids)])
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(call(number) for number in range(calls)))
+    return calls / (time.perf_counter() - started_at)
+
+
+class Command(BaseCommand):
+    help = 'Compare DB read throughput of the shared thread and the pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=50000)
+        parser.add_argument('--calls', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=16)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            old_name = create_file_test_db(Path(directory))
+            try:
+                category_ids = create_products(50, options['products'])
+                connection.close()
+                shared_thread = asyncio.run(measure(
+                    sync_to_async,
+                    category_ids,
+                    options['calls'],
+                    options['concurrency']
+                ))
+                pool = asyncio.run(measure(
+                    db_read,
+                    category_ids,
+                    options['calls'],
+                    options['concurrency']
+                ))
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+        self.stdout.write(f'Общий поток: {shared_thread:.0f} запросов/сек.')
+        self.stdout.write(f'Пул чтения: {pool:.0f} запросов/сек.')
+        self.stdout.write(f'Ускорение: {pool / shared_thread:.1f}x')
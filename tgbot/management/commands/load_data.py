@@ -1,6 +1,15 @@
+import csv
+import json
+import time
+from collections import Counter
+
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from more_itertools import chunked
 
 from products.models import Category, Product
+from products.search import rebuild_index
 from ._products import products_with_price
 
 
@@ -41,16 +50,70 @@ CATEGORIES = {
 }
 
 
-def create_products():
-    for product in products_with_price:
-        category = Category.objects.get(name=product['category'])
-        new_product = Product.objects.get_or_create(
-            name=product['name'],
-            description=product['description'],
-            price=product['price'],
-            category=category,
+def read_rows(filepath):
+    with open(filepath, newline='', encoding='utf-8-sig') as file:
+        if filepath.endswith('.jsonl'):
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(file)
+
+
+@transaction.atomic
+def save_products_chunk(rows, categories):
+    products = {}
+    skipped = 0
+    for row in rows:
+        category_id = categories.get(row['category'])
+        if not category_id:
+            skipped += 1
+            continue
+        products[(row['name'], category_id)] = row
+    existing = {
+        (name, category_id): product_id
+        for product_id, name, category_id in Product.objects.filter(
+            name__in={name for name, _ in products}
+        ).values_list('id', 'name', 'category_id')
+    }
+    new_products = []
+    changed_products = []
+    updated_at = timezone.now()
+    for (name, category_id), row in products.items():
+        product = Product(
+            id=existing.get((name, category_id)),
+            name=name,
+            description=row.get('description', ''),
+            price=row['price'],
+            category_id=category_id,
+            updated_at=updated_at,
+        )
+        if product.id:
+            changed_products.append(product)
+        else:
+            new_products.append(product)
+    Product.objects.bulk_create(new_products)
+    Product.objects.bulk_update(
+        changed_products, ['description', 'price', 'updated_at'])
+    return len(new_products), len(changed_products), skipped
+
+
+def create_products(rows, chunk_size, stdout):
+    categories = dict(Category.objects.values_list('name', 'id'))
+    started_at = time.monotonic()
+    totals = Counter()
+    for chunk in chunked(rows, chunk_size):
+        created, updated, skipped = save_products_chunk(chunk, categories)
+        totals.update(created=created, updated=updated, skipped=skipped)
+        rows_count = sum(totals.values())
+        rows_per_second = rows_count / (time.monotonic() - started_at)
+        stdout.write(
+            f'Обработано {rows_count} строк, {rows_per_second:.0f} строк/сек.'
         )
-        print(f'{new_product} добавлен')
+    stdout.write(
+        f'Добавлено {totals["created"]}, обновлено {totals["updated"]}, '
+        f'пропущено без категории {totals["skipped"]}'
+    )
 
 
 def create_categories():
@@ -71,6 +134,18 @@ def create_categories():
 class Command(BaseCommand):
     help = "Load data"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            help='CSV или JSONL с полями name, description, price, category'
+        )
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
     def handle(self, *args, **options):
-        create_categories()
-        create_products()
+        if options['file']:
+            rows = read_rows(options['file'])
+        else:
+            create_categories()
+            rows = products_with_price
+        create_products(rows, options['chunk_size'], self.stdout)
+        rebuild_index()
@@ -0,0 +1,51 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from products.models import Product
+from products.previews import get_preview_name, make_preview
+
+
+class Command(BaseCommand):
+    help = 'Create previews for product images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.PREVIEW_WORKERS,
+            help='Количество процессов'
+        )
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(image='').exclude(
+            image__isnull=True).filter(
+            Q(image_preview='') | Q(image_preview__isnull=True))
+        futures = {}
+        with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            for product in products.only('id', 'image'):
+                if not os.path.exists(product.image.path):
+                    self.stderr.write(f'Нет файла {product.image.name}')
+                    continue
+                preview_name = get_preview_name(product.image.name)
+                future = executor.submit(
+                    make_preview,
+                    product.image.path,
+                    product.image.storage.path(preview_name)
+                )
+                product.image_preview = preview_name
+                futures[future] = product
+            done = []
+            for future in as_completed(futures):
+                product = futures[future]
+                try:
+                    future.result()
+                except Exception as error:
+                    self.stderr.write(f'{product.image.name}: {error}')
+                    continue
+                done.append(product)
+        Product.objects.bulk_update(done, ['image_preview'], batch_size=1000)
+        self.stdout.write(f'Создано уменьшенных фото: {len(done)}')
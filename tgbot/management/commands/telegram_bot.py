@@ -1,46 +1,75 @@
 import logging
 import textwrap as tw
 import re
+import sys
+import threading
+from collections import defaultdict
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 from more_itertools import chunked
-from django.utils import timezone
 from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.utils import timezone
 
 from telegram import (
     InlineKeyboardButton,
     InlineKeyboardMarkup,
+    InlineQueryResultArticle,
+    InputMediaPhoto,
+    InputTextMessageContent,
     LabeledPrice,
     ReplyKeyboardRemove,
+    Update,
 )
 from telegram.constants import ParseMode
 from telegram.ext import (
     Application,
     CallbackQueryHandler,
+    ChatMemberHandler,
     CommandHandler,
     ConversationHandler,
     filters,
+    InlineQueryHandler,
     MessageHandler,
     PreCheckoutQueryHandler
 )
-
+from telegram.request import HTTPXRequest
+
+from tgbot.application import StoreApplication
+from tgbot.cards import get_card
+from tgbot.catalog import get_version, load_categories
+from tgbot.db import db_read
+from tgbot.faq import get_faq_pages, load_faq
+from tgbot.metrics import instrument_handlers, MeteredRequest, render_metrics
+from tgbot.outbound import OutboundScheduler
+from tgbot.persistence import DjangoPersistence
+from tgbot.subscriptions import (
+    is_subscribed,
+    is_subscription_channel,
+    subscriptions,
+)
+from ._broadcast import broadcast
 from ._tools import (
     add_product_to_cart,
     build_menu,
     change_status_mailing,
     create_client,
     create_order,
+    export_new_orders,
+    find_products,
     get_cart_products_info,
     get_catigories,
-    get_clients,
     get_mailing,
+    get_unfinished_mailings,
     get_product_detail,
     get_product_info_for_payment,
     get_product_name,
     get_products,
-    get_text_faq,
+    iter_recipients,
     remove_product_from_cart,
-    upload_to_exel
+    save_deliveries,
+    save_image_file_id,
 )
 
 
@@ -56,6 +85,14 @@ from ._tools import (
     START_OVER
 ) = range(9)
 
+INLINE_RESULTS_LIMIT = 20
+API_CONNECTION_POOL_SIZE = 256
+MENU_CACHE_SIZE = 512
+DELIVERY_BATCH_SIZE = 100
+
+running_mailings = set()
+scheduled_mailings = {}
+
 
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -68,10 +105,15 @@ logger = logging.getLogger(__name__)
 async def get_chat_member(update, context):
     subscription_channel_id = settings.SUBSCRIPTION_CHANNEL_ID
     subscription_channel_link = settings.SUBSCRIPTION_CHANNEL_LINK
-    user_status_chanel = await context.bot.get_chat_member(
-        chat_id=subscription_channel_id, user_id=update.effective_chat.id)
-
-    if 'left' in user_status_chanel['status']:
+    user_id = update.effective_chat.id
+    is_member = subscriptions.get(user_id)
+    if is_member is None:
+        user_status_chanel = await context.bot.get_chat_member(
+            chat_id=subscription_channel_id, user_id=user_id)
+        is_member = is_subscribed(user_status_chanel['status'])
+        subscriptions.set(user_id, is_member)
+
+    if not is_member:
         reply_markup = InlineKeyboardMarkup(
             [
                 [InlineKeyboardButton(
@@ -87,6 +129,15 @@ async def get_chat_member(update, context):
         return True
 
 
+async def handle_channel_member(update, context):
+    chat_member = update.chat_member
+    if is_subscription_channel(chat_member.chat):
+        subscriptions.set(
+            chat_member.new_chat_member.user.id,
+            is_subscribed(chat_member.new_chat_member.status)
+        )
+
+
 async def start(update, context):
     text = 'Выберете действие:'
     keyboard = InlineKeyboardMarkup(
@@ -168,7 +219,14 @@ async def show_previos_page(update, context, super_category_id):
 
 
 async def get_menu(current_page, category_id):
-    categories = await get_catigories(category_id)
+    if category_id is not None:
+        category_id = int(category_id)
+    return build_menu_markup(get_version(), category_id, current_page)
+
+
+@lru_cache(maxsize=MENU_CACHE_SIZE)
+def build_menu_markup(catalog_version, category_id, current_page):
+    categories = get_catigories(category_id)
     categories_per_page = 4
     categories_group = list(chunked(categories, categories_per_page))
     keyboard = [
@@ -233,41 +291,79 @@ async def handle_sub_categories(update, context):
     return HANDLE_PRODUCTS
 
 
-async def handle_products(update, context):
-    product_category = update.callback_query.data
-    products_category = await get_products(product_category)
-    products_num = len(products_category)
-    for product in products_category:
-        put_cart_button = InlineKeyboardMarkup(
-            [[InlineKeyboardButton('Добавить в корзину',
-                                   callback_data=product.id)]]
+def get_product_photo(product):
+    return product.image_file_id or product.image_preview or product.image
+
+
+async def send_products_photos(update, context, products):
+    if len(products) == 1:
+        product = products[0]
+        message = await context.bot.send_photo(
+            chat_id=update.effective_chat.id,
+            photo=get_product_photo(product),
+            caption=get_product_detail(product),
+            parse_mode=ParseMode.HTML
         )
-        if not product.image:
-            await context.bot.send_message(
-                chat_id=update.effective_chat.id,
-                text=get_product_detail(product),
-                reply_markup=put_cart_button,
-                parse_mode=ParseMode.HTML
-            )
-        else:
-            await context.bot.send_photo(
-                chat_id=update.effective_chat.id,
-                photo=product.image,
+        messages = [message]
+    else:
+        media = [
+            InputMediaPhoto(
+                media=get_product_photo(product),
                 caption=get_product_detail(product),
-                reply_markup=put_cart_button,
                 parse_mode=ParseMode.HTML
-            )
-    keyboard = [
+            ) for product in products
+        ]
+        messages = await context.bot.send_media_group(
+            chat_id=update.effective_chat.id,
+            media=media
+        )
+    for product, message in zip(products, messages):
+        if not product.image_file_id:
+            await save_image_file_id(product, message.photo[-1].file_id)
+
+
+async def handle_products(update, context):
+    if update.callback_query.data == 'Ещё':
+        product_category = context.user_data['product_category']
+        last_product_id = context.user_data['last_product_id']
+    else:
+        product_category = update.callback_query.data
+        last_product_id = 0
+        context.user_data['product_category'] = product_category
+        context.user_data['products_shown'] = 0
+    await update.callback_query.answer()
+    products, has_more = await get_products(
+        product_category,
+        last_product_id,
+        settings.PRODUCTS_PER_PAGE
+    )
+    products_with_image = [product for product in products if product.image]
+    if products_with_image:
+        await send_products_photos(update, context, products_with_image)
+
+    if products:
+        context.user_data['last_product_id'] = products[-1].id
+    context.user_data['products_shown'] += len(products)
+    text = ''.join(
+        get_product_detail(product)
+        for product in products if not product.image
+    )
+    text += f'Показано товаров: {context.user_data["products_shown"]}'
+    keyboard = [[get_card(product).button] for product in products]
+    if has_more:
+        keyboard.append([InlineKeyboardButton('Ещё', callback_data='Ещё')])
+    keyboard.append(
         [
             InlineKeyboardButton('Назад', callback_data='Назад'),
             InlineKeyboardButton('Главное меню', callback_data='Главное меню')
         ]
-    ]
+    )
     reply_markup = InlineKeyboardMarkup(keyboard)
     await context.bot.send_message(
-        text=f'Показано товаров: {products_num}',
+        text=text,
         chat_id=update.effective_chat.id,
-        reply_markup=reply_markup
+        reply_markup=reply_markup,
+        parse_mode=ParseMode.HTML
     )
     return HANDLE_DESCRIPTION
 
@@ -391,7 +487,7 @@ async def handle_cart(update, context):
 async def remove_product(update, context):
     product_id = update.callback_query.data
     context.user_data['product_id'] = product_id
-    await remove_product_from_cart(context)
+    remove_product_from_cart(context)
     await update.callback_query.answer('Товар удален из корзины')
     await handle_cart(update, context)
     return HANDLE_MENU
@@ -450,9 +546,9 @@ async def handle_user_payment(update, context):
     description = order_info['products_info']
     payload = 'telegram-store'
     currency = 'RUB'
-    price = order_info['total_order_price']
+    price = order_info['total_order_kopecks']
     payment_token = settings.PAYMENT_TOKEN
-    prices = [LabeledPrice('Оплата товаров', int(price) * 100)]
+    prices = [LabeledPrice('Оплата товаров', price)]
     await context.bot.send_invoice(
         chat_id, title, description, payload, payment_token, currency, prices
     )
@@ -476,8 +572,9 @@ async def successful_payment_callback(update, context):
             ]
         ]
     )
-    if await create_order(context):
-        await upload_to_exel()
+    payment = update.message.successful_payment
+    if await create_order(context, payment.telegram_payment_charge_id):
+        context.application.create_task(export_new_orders())
         context.user_data['cart'] = None
         await update.message.reply_text(
             'Успешно! Ожидайте доставку.',
@@ -486,21 +583,67 @@ async def successful_payment_callback(update, context):
     return HANDLE_MENU
 
 
-async def handle_mailing(context):
-    mailings = await get_mailing()
-    if mailings:
-        for mailing in mailings:
-            start_time = mailing.start_date.strftime('%m-%d-%Y %H:%M')
-            now_time = timezone.now().strftime('%m-%d-%Y %H:%M')
-            if start_time == now_time:
-                clients = await get_clients()
-                for client in clients:
-                    await context.bot.send_message(
-                        text=mailing.text,
-                        chat_id=client,
-                        parse_mode=ParseMode.HTML
-                    )
-                await change_status_mailing(mailing)
+async def send_mailing(bot, mailing):
+    results = defaultdict(list)
+
+    async def save_results():
+        nonlocal results
+        batch, results = results, defaultdict(list)
+        for status, chat_ids in batch.items():
+            await save_deliveries(mailing, status, chat_ids)
+
+    async def record_result(chat_id, status):
+        results[status].append(chat_id)
+        if sum(len(chat_ids) for chat_ids in results.values()) >= \
+                DELIVERY_BATCH_SIZE:
+            await save_results()
+
+    try:
+        await broadcast(
+            bot,
+            iter_recipients(mailing),
+            mailing.text,
+            concurrency=settings.MAILING_CONCURRENCY,
+            rate=settings.MAILING_RATE_LIMIT,
+            on_result=record_result,
+        )
+        await save_results()
+        await change_status_mailing(mailing)
+    finally:
+        running_mailings.discard(mailing.id)
+
+
+def schedule_mailing(job_queue, mailing_id, start_date=None):
+    name = f'mailing-{mailing_id}'
+    for job in job_queue.get_jobs_by_name(name):
+        job.schedule_removal()
+    scheduled_mailings.pop(mailing_id, None)
+    if start_date is None:
+        return
+    job_queue.run_once(
+        start_mailing,
+        when=max(start_date, timezone.now()),
+        data=mailing_id,
+        name=name
+    )
+    scheduled_mailings[mailing_id] = start_date
+
+
+async def start_mailing(context):
+    scheduled_mailings.pop(context.job.data, None)
+    mailing = await get_mailing(context.job.data)
+    if not mailing or mailing.id in running_mailings:
+        return
+    running_mailings.add(mailing.id)
+    context.application.create_task(send_mailing(context.bot, mailing))
+
+
+async def schedule_mailings(context):
+    for mailing_id, start_date in await get_unfinished_mailings():
+        if mailing_id in running_mailings:
+            continue
+        if scheduled_mailings.get(mailing_id) != start_date:
+            schedule_mailing(context.job_queue, mailing_id, start_date)
 
 
 async def cancel(update, context):
@@ -513,37 +656,83 @@ async def cancel(update, context):
 
 
 async def handle_faq(update, context):
-    text = '<b>Часто задаваемые вопросы</b>'
+    query = update.callback_query
+    pages = get_faq_pages()
+    _, _, page = query.data.partition(':')
+    page = min(int(page or 0), len(pages) - 1)
+    navigation = []
+    if page > 0:
+        navigation.append(
+            InlineKeyboardButton('◀️', callback_data=f'faq:{page - 1}'))
+    if page < len(pages) - 1:
+        navigation.append(
+            InlineKeyboardButton('▶️', callback_data=f'faq:{page + 1}'))
     reply_markup = InlineKeyboardMarkup(
-        [[InlineKeyboardButton('Назад', callback_data='Назад')]]
+        [navigation, [InlineKeyboardButton('Назад', callback_data='Назад')]]
     )
-    text_faq = await get_text_faq()
-    await update.callback_query.answer()
-    await update.callback_query.edit_message_text(
-        tw.dedent(f'''
-        {text}
-        {text_faq}
-        '''),
+    await query.answer()
+    await query.edit_message_text(
+        pages[page],
         reply_markup=reply_markup,
         parse_mode=ParseMode.HTML
     )
     return HANDLE_MENU
 
 
+async def refresh_caches(context):
+    await db_read(load_categories)()
+    await db_read(load_faq)()
+
+
+async def handle_inline_search(update, context):
+    query = update.inline_query
+    offset = int(query.offset or 0)
+    products = await find_products(query.query, offset, INLINE_RESULTS_LIMIT)
+    results = [
+        InlineQueryResultArticle(
+            id=str(product.id),
+            title=product.name,
+            description=f'Цена {product.price} руб.',
+            input_message_content=InputTextMessageContent(
+                get_product_detail(product),
+                parse_mode=ParseMode.HTML
+            )
+        ) for product in products
+    ]
+    next_offset = ''
+    if len(products) == INLINE_RESULTS_LIMIT:
+        next_offset = str(offset + INLINE_RESULTS_LIMIT)
+    await query.answer(results, next_offset=next_offset, cache_time=60)
+
+
 async def handle_error(update, context):
     logger.error(context.error)
 
 
-def bot_starting():
+def build_application(request=None):
     tg_token = settings.TG_TOKEN
-    tg_chat_id = settings.TG_CHAT_ID
-    application = Application.builder().token(tg_token).build()
-    application.job_queue.run_repeating(handle_mailing, interval=60, first=10)
+    persistence = DjangoPersistence(
+        update_interval=settings.PERSISTENCE_UPDATE_INTERVAL
+    )
+    builder = Application.builder().token(tg_token).persistence(
+        persistence).application_class(StoreApplication).concurrent_updates(
+        sys.maxsize).rate_limiter(
+        OutboundScheduler(settings.BOT_API_RATE_LIMIT))
+    request = MeteredRequest(
+        request or HTTPXRequest(connection_pool_size=API_CONNECTION_POOL_SIZE)
+    )
+    application = builder.request(request).build()
+    application.job_queue.run_repeating(
+        refresh_caches,
+        interval=settings.CATALOG_REFRESH_INTERVAL,
+        first=settings.CATALOG_REFRESH_INTERVAL
+    )
     conv_handler = ConversationHandler(
         entry_points=[CommandHandler('start', start)],
         states={
             HANDLE_MENU: [
                 CallbackQueryHandler(handle_user_payment, pattern=r'Оплатить'),
+                CallbackQueryHandler(handle_faq, pattern=r'faq'),
                 CallbackQueryHandler(remove_product, pattern=r'[0-9]'),
                 CallbackQueryHandler(start, pattern='Назад'),
                 CallbackQueryHandler(add_delivery_address,
@@ -569,6 +758,7 @@ def bot_starting():
             ],
             HANDLE_DESCRIPTION: [
                 CallbackQueryHandler(handle_product_detail, pattern=r'[0-9]'),
+                CallbackQueryHandler(handle_products, pattern=r'Ещё'),
                 CallbackQueryHandler(handle_sub_categories, pattern=r'Назад'),
                 CallbackQueryHandler(start, pattern=r'Главное меню'),
             ],
@@ -598,15 +788,63 @@ def bot_starting():
         ],
         per_chat=False,
         allow_reentry=True,
+        name='store',
+        persistent=True,
     )
 
     application.add_handler(conv_handler)
+    application.add_handler(
+        ChatMemberHandler(handle_channel_member, ChatMemberHandler.CHAT_MEMBER)
+    )
+    application.add_handler(InlineQueryHandler(handle_inline_search))
+    for handlers in application.handlers.values():
+        instrument_handlers(handlers)
+    return application
+
+
+def serve_metrics(port):
 
-    application.run_polling()
+    class MetricsHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            body = render_metrics().encode()
+            self.send_response(200)
+            self.send_header(
+                'Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('', port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+
+def bot_starting(metrics_port=None):
+    application = build_application()
+    application.job_queue.run_repeating(
+        schedule_mailings,
+        interval=settings.MAILING_SYNC_INTERVAL,
+        first=10
+    )
+    load_categories()
+    load_faq()
+    if metrics_port:
+        serve_metrics(metrics_port)
+    application.run_polling(allowed_updates=Update.ALL_TYPES)
 
 
 class Command(BaseCommand):
     help = 'Telegram bot'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--metrics-port',
+            type=int,
+            help='Порт для метрик Prometheus в режиме опроса'
+        )
+
     def handle(self, *args, **options):
-        bot_starting()
+        bot_starting(options['metrics_port'])
@@ -0,0 +1,254 @@
+import functools
+import threading
+import time
+from collections import defaultdict
+from http import HTTPStatus
+
+from django.db import connection
+from telegram.ext import ConversationHandler
+from telegram.request import BaseRequest
+
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+
+
+class Counter:
+
+    def __init__(self, name, help_text, label):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.values = defaultdict(float)
+        self.lock = threading.Lock()
+
+    def inc(self, label_value, amount=1):
+        with self.lock:
+            self.values[label_value] += amount
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.help_text}',
+            f'# TYPE {self.name} counter',
+        ]
+        with self.lock:
+            for label_value, value in sorted(self.values.items()):
+                lines.append(
+                    f'{self.name}{{{self.label}="{label_value}"}} {value}')
+        return lines
+
+
+class Gauge:
+
+    def __init__(self, name, help_text, label):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.values = defaultdict(float)
+        self.lock = threading.Lock()
+
+    def inc(self, label_value, amount=1):
+        with self.lock:
+            self.values[label_value] += amount
+
+    def dec(self, label_value, amount=1):
+        self.inc(label_value, -amount)
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.help_text}',
+            f'# TYPE {self.name} gauge',
+        ]
+        with self.lock:
+            for label_value, value in sorted(self.values.items()):
+                lines.append(
+                    f'{self.name}{{{self.label}="{label_value}"}} {value}')
+        return lines
+
+
+class Histogram:
+
+    def __init__(self, name, help_text, label, buckets=DURATION_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        self.counts = defaultdict(lambda: [0] * len(self.buckets))
+        self.sums = defaultdict(float)
+        self.totals = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def observe(self, label_value, value):
+        with self.lock:
+            counts = self.counts[label_value]
+            for index, bucket in enumerate(self.buckets):
+                if value <= bucket:
+                    counts[index] += 1
+            self.sums[label_value] += value
+            self.totals[label_value] += 1
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.help_text}',
+            f'# TYPE {self.name} histogram',
+        ]
+        with self.lock:
+            for label_value in sorted(self.totals):
+                label = f'{self.label}="{label_value}"'
+                for bucket, count in zip(
+                        self.buckets, self.counts[label_value]):
+                    lines.append(
+                        f'{self.name}_bucket{{{label},le="{bucket}"}} {count}')
+                lines.append(
+                    f'{self.name}_bucket{{{label},le="+Inf"}} '
+                    f'{self.totals[label_value]}'
+                )
+                lines.append(
+                    f'{self.name}_sum{{{label}}} {self.sums[label_value]}')
+                lines.append(
+                    f'{self.name}_count{{{label}}} {self.totals[label_value]}')
+        return lines
+
+
+handler_duration = Histogram(
+    'bot_handler_duration_seconds',
+    'Время работы обработчика',
+    'handler'
+)
+handler_errors = Counter(
+    'bot_handler_errors_total',
+    'Исключения в обработчиках',
+    'handler'
+)
+db_call_duration = Histogram(
+    'bot_db_call_duration_seconds',
+    'Время работы функции с запросами к базе',
+    'function'
+)
+db_queries = Counter(
+    'bot_db_queries_total',
+    'Запросы к базе',
+    'function'
+)
+api_requests = Counter(
+    'bot_api_requests_total',
+    'Вызовы Bot API',
+    'method'
+)
+api_errors = Counter(
+    'bot_api_errors_total',
+    'Неуспешные вызовы Bot API',
+    'method'
+)
+update_wait = Histogram(
+    'bot_update_wait_seconds',
+    'Ожидание обновления в очереди до начала обработки',
+    'kind'
+)
+api_queue_depth = Gauge(
+    'bot_api_queue_depth',
+    'Вызовы Bot API, ожидающие очереди',
+    'lane'
+)
+api_retry_after = Counter(
+    'bot_api_retry_after_seconds_total',
+    'Пауза по требованию Телеграма (retry_after)',
+    'method'
+)
+
+METRICS = (
+    handler_duration,
+    handler_errors,
+    db_call_duration,
+    db_queries,
+    api_requests,
+    api_errors,
+    update_wait,
+    api_queue_depth,
+    api_retry_after,
+)
+
+
+def render_metrics():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def track_db(function):
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        queries_count = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries_count
+            queries_count += 1
+            return execute(sql, params, many, context)
+
+        started_at = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count_query):
+                return function(*args, **kwargs)
+        finally:
+            db_call_duration.observe(
+                function.__name__, time.perf_counter() - started_at)
+            db_queries.inc(function.__name__, queries_count)
+
+    return wrapper
+
+
+def track_handler(callback):
+
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        started_at = time.perf_counter()
+        try:
+            return await callback(update, context)
+        except Exception:
+            handler_errors.inc(callback.__name__)
+            raise
+        finally:
+            handler_duration.observe(
+                callback.__name__, time.perf_counter() - started_at)
+
+    wrapper.is_tracked = True
+    return wrapper
+
+
+def instrument_handlers(handlers):
+    for handler in handlers:
+        if isinstance(handler, ConversationHandler):
+            instrument_handlers(handler.entry_points)
+            for state_handlers in handler.states.values():
+                instrument_handlers(state_handlers)
+            instrument_handlers(handler.fallbacks)
+        elif not getattr(handler.callback, 'is_tracked', False):
+            handler.callback = track_handler(handler.callback)
+
+
+class MeteredRequest(BaseRequest):
+
+    def __init__(self, request):
+        self.request = request
+
+    async def initialize(self):
+        await self.request.initialize()
+
+    async def shutdown(self):
+        await self.request.shutdown()
+
+    async def do_request(self, url, method, request_data=None, **kwargs):
+        api_method = url.rsplit('/', 1)[-1]
+        api_requests.inc(api_method)
+        try:
+            code, payload = await self.request.do_request(
+                url, method, request_data, **kwargs)
+        except Exception:
+            api_errors.inc(api_method)
+            raise
+        if code != HTTPStatus.OK:
+            api_errors.inc(api_method)
+        return code, payload
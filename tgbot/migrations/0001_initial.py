@@ -0,0 +1,26 @@
+# Generated by Django 4.0 on 2026-10-18 10:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportMark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Выгрузка')),
+                ('last_id', models.BigIntegerField(default=0, verbose_name='Последний выгруженный ID')),
+            ],
+            options={
+                'verbose_name': 'Отметка выгрузки',
+                'verbose_name_plural': 'Отметки выгрузки',
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.0 on 2026-10-18 10:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tgbot', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserData',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.BigIntegerField(unique=True, verbose_name='Телеграм ID')),
+                ('data', models.BinaryField(verbose_name='Данные')),
+            ],
+            options={
+                'verbose_name': 'Данные пользователя',
+                'verbose_name_plural': 'Данные пользователей',
+            },
+        ),
+        migrations.CreateModel(
+            name='ConversationState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, verbose_name='Диалог')),
+                ('key', models.CharField(max_length=100, verbose_name='Ключ')),
+                ('state', models.JSONField(verbose_name='Состояние')),
+            ],
+            options={
+                'verbose_name': 'Состояние диалога',
+                'verbose_name_plural': 'Состояния диалогов',
+                'unique_together': {('name', 'key')},
+            },
+        ),
+    ]
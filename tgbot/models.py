@@ -1,3 +1,39 @@
 from django.db import models
 
-# Create your models here.
+
+class ExportMark(models.Model):
+    name = models.CharField('Выгрузка', max_length=50, unique=True)
+    last_id = models.BigIntegerField('Последний выгруженный ID', default=0)
+
+    class Meta:
+        verbose_name = 'Отметка выгрузки'
+        verbose_name_plural = 'Отметки выгрузки'
+
+    def __str__(self):
+        return f'{self.name} {self.last_id}'
+
+
+class UserData(models.Model):
+    user_id = models.BigIntegerField('Телеграм ID', unique=True)
+    data = models.BinaryField('Данные')
+
+    class Meta:
+        verbose_name = 'Данные пользователя'
+        verbose_name_plural = 'Данные пользователей'
+
+    def __str__(self):
+        return f'{self.user_id}'
+
+
+class ConversationState(models.Model):
+    name = models.CharField('Диалог', max_length=50)
+    key = models.CharField('Ключ', max_length=100)
+    state = models.JSONField('Состояние')
+
+    class Meta:
+        verbose_name = 'Состояние диалога'
+        verbose_name_plural = 'Состояния диалогов'
+        unique_together = ('name', 'key')
+
+    def __str__(self):
+        return f'{self.name} {self.key} {self.state}'
@@ -0,0 +1,141 @@
+import asyncio
+import itertools
+import logging
+import time
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from tgbot.metrics import api_queue_depth, api_retry_after
+
+
+INTERACTIVE = 0
+BROADCAST = 1
+LANES = {
+    INTERACTIVE: 'interactive',
+    BROADCAST: 'broadcast',
+}
+
+PRIVATE_CHAT_RATE = 1
+GROUP_CHAT_RATE = 20 / 60
+CHAT_BURST = 20
+CHAT_BUCKETS_LIMIT = 10000
+MESSAGE_ENDPOINTS = ('send', 'edit', 'copy', 'forward')
+MAX_RETRIES = 3
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    def is_full(self):
+        self.refill()
+        return self.tokens >= self.capacity
+
+    def reserve(self):
+        self.refill()
+        self.tokens -= 1
+        return max(0, -self.tokens / self.rate)
+
+
+class OutboundScheduler(BaseRateLimiter):
+
+    def __init__(self, rate, max_retries=MAX_RETRIES):
+        self.bucket = TokenBucket(rate, rate)
+        self.chat_buckets = {}
+        self.max_retries = max_retries
+        self.sequence = itertools.count()
+        self.paused_until = 0
+        self.queue = None
+        self.dispatcher = None
+
+    async def initialize(self):
+        if self.dispatcher:
+            return
+        self.queue = asyncio.PriorityQueue()
+        self.dispatcher = asyncio.create_task(self.dispatch())
+
+    async def shutdown(self):
+        if self.dispatcher:
+            self.dispatcher.cancel()
+            await asyncio.gather(self.dispatcher, return_exceptions=True)
+            self.dispatcher = None
+
+    async def wait_pause(self):
+        pause = self.paused_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+
+    async def dispatch(self):
+        while True:
+            priority, _, ticket = await self.queue.get()
+            api_queue_depth.dec(LANES[priority])
+            await self.wait_pause()
+            await asyncio.sleep(self.bucket.reserve())
+            if not ticket.done():
+                ticket.set_result(None)
+
+    async def wait_turn(self, priority):
+        ticket = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((priority, next(self.sequence), ticket))
+        api_queue_depth.inc(LANES[priority])
+        await ticket
+
+    def get_chat_bucket(self, chat_id):
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket:
+            return bucket
+        if len(self.chat_buckets) >= CHAT_BUCKETS_LIMIT:
+            self.chat_buckets = {
+                chat_id: bucket
+                for chat_id, bucket in self.chat_buckets.items()
+                if not bucket.is_full()
+            }
+        is_group = isinstance(chat_id, str) or chat_id < 0
+        rate = GROUP_CHAT_RATE if is_group else PRIVATE_CHAT_RATE
+        bucket = self.chat_buckets[chat_id] = TokenBucket(rate, CHAT_BURST)
+        return bucket
+
+    async def process_request(self, callback, args, kwargs, endpoint, data,
+                              rate_limit_args):
+        priority = BROADCAST if rate_limit_args == BROADCAST else INTERACTIVE
+        chat_id = data.get('chat_id')
+        is_message = endpoint.startswith(MESSAGE_ENDPOINTS)
+        attempt = 0
+        while True:
+            if is_message:
+                if chat_id is not None:
+                    await asyncio.sleep(
+                        self.get_chat_bucket(chat_id).reserve())
+                await self.wait_turn(priority)
+            else:
+                await self.wait_pause()
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as error:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                logger.warning(
+                    f'Flood control в {endpoint}, '
+                    f'пауза {error.retry_after} сек.'
+                )
+                api_retry_after.inc(endpoint, error.retry_after)
+                self.paused_until = max(
+                    self.paused_until,
+                    time.monotonic() + error.retry_after
+                )
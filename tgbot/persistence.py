@@ -0,0 +1,170 @@
+import asyncio
+import json
+import logging
+import pickle
+from collections import defaultdict
+
+from django.db import transaction
+from telegram.ext import BasePersistence, PersistenceInput
+
+from tgbot.db import db_read, db_write
+from tgbot.models import ConversationState, UserData
+
+
+logger = logging.getLogger(__name__)
+
+
+def load_user_data():
+    return {
+        user_id: pickle.loads(data)
+        for user_id, data in UserData.objects.values_list('user_id', 'data')
+    }
+
+
+def load_conversations(name):
+    states = ConversationState.objects.filter(name=name).values_list(
+        'key', 'state')
+    return {tuple(json.loads(key)): state for key, state in states}
+
+
+@transaction.atomic
+def save_user_data(user_data, dropped_user_ids):
+    UserData.objects.filter(user_id__in=dropped_user_ids).delete()
+    existing = UserData.objects.in_bulk(
+        list(user_data), field_name='user_id')
+    for user_id, row in existing.items():
+        row.data = user_data[user_id]
+    UserData.objects.bulk_update(existing.values(), ['data'])
+    UserData.objects.bulk_create(
+        UserData(user_id=user_id, data=data)
+        for user_id, data in user_data.items() if user_id not in existing
+    )
+
+
+@transaction.atomic
+def save_conversations(conversations):
+    states_by_name = defaultdict(dict)
+    for (name, key), state in conversations.items():
+        states_by_name[name][key] = state
+    for name, states in states_by_name.items():
+        ended_keys = [key for key, state in states.items() if state is None]
+        ConversationState.objects.filter(
+            name=name, key__in=ended_keys).delete()
+        existing = {
+            row.key: row for row in ConversationState.objects.filter(
+                name=name, key__in=list(states))
+        }
+        for key, row in existing.items():
+            row.state = states[key]
+        ConversationState.objects.bulk_update(existing.values(), ['state'])
+        ConversationState.objects.bulk_create(
+            ConversationState(name=name, key=key, state=state)
+            for key, state in states.items()
+            if state is not None and key not in existing
+        )
+
+
+class DjangoPersistence(BasePersistence):
+
+    def __init__(self, update_interval=60, flush_delay=1):
+        super().__init__(
+            store_data=PersistenceInput(
+                bot_data=False,
+                chat_data=False,
+                callback_data=False
+            ),
+            update_interval=update_interval
+        )
+        self.flush_delay = flush_delay
+        self.pending_user_data = {}
+        self.dropped_user_ids = set()
+        self.pending_conversations = {}
+        self.flush_task = None
+
+    async def get_user_data(self):
+        return await db_read(load_user_data)()
+
+    async def get_chat_data(self):
+        return {}
+
+    async def get_bot_data(self):
+        return {}
+
+    async def get_callback_data(self):
+        return None
+
+    async def get_conversations(self, name):
+        return await db_read(load_conversations)(name)
+
+    async def update_conversation(self, name, key, new_state):
+        self.pending_conversations[(name, json.dumps(key))] = new_state
+        self.schedule_flush()
+
+    async def update_user_data(self, user_id, data):
+        self.pending_user_data[user_id] = pickle.dumps(data)
+        self.dropped_user_ids.discard(user_id)
+        self.schedule_flush()
+
+    async def drop_user_data(self, user_id):
+        self.pending_user_data.pop(user_id, None)
+        self.dropped_user_ids.add(user_id)
+        self.schedule_flush()
+
+    async def update_chat_data(self, chat_id, data):
+        pass
+
+    async def update_bot_data(self, data):
+        pass
+
+    async def update_callback_data(self, data):
+        pass
+
+    async def drop_chat_data(self, chat_id):
+        pass
+
+    async def refresh_user_data(self, user_id, user_data):
+        pass
+
+    async def refresh_chat_data(self, chat_id, chat_data):
+        pass
+
+    async def refresh_bot_data(self, bot_data):
+        pass
+
+    async def flush(self):
+        if self.flush_task and not self.flush_task.done():
+            await self.flush_task
+        await self.write_pending()
+
+    def schedule_flush(self):
+        if self.flush_task is None or self.flush_task.done():
+            self.flush_task = asyncio.create_task(self.delayed_flush())
+
+    async def delayed_flush(self):
+        await asyncio.sleep(self.flush_delay)
+        await self.write_pending()
+
+    async def write_pending(self):
+        user_data, self.pending_user_data = self.pending_user_data, {}
+        dropped_user_ids, self.dropped_user_ids = self.dropped_user_ids, set()
+        conversations, self.pending_conversations = (
+            self.pending_conversations, {})
+        try:
+            if user_data or dropped_user_ids:
+                await db_write(save_user_data)(
+                    user_data, dropped_user_ids)
+            if conversations:
+                await db_write(save_conversations)(conversations)
+        except Exception as error:
+            logger.error(f'Не удалось сохранить данные бота: {error}')
+            for user_id, data in user_data.items():
+                self.pending_user_data.setdefault(user_id, data)
+            for key, state in conversations.items():
+                self.pending_conversations.setdefault(key, state)
+            self.dropped_user_ids |= dropped_user_ids - set(
+                self.pending_user_data)
+            return
+        logger.debug(
+            f'Сохранено: пользователей {len(user_data)}, '
+            f'диалогов {len(conversations)}'
+        )
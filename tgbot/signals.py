@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from faq.models import FAQ
+from mailings.models import Mailing
+from products.models import Category, Product
+from tgbot.cards import forget_product
+from tgbot.catalog import load_categories
+from tgbot.faq import load_faq
+from tgbot.webhook import reschedule_mailing
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def reload_categories(sender, **kwargs):
+    transaction.on_commit(load_categories)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def forget_product_card(sender, instance, **kwargs):
+    forget_product(instance.id)
+
+
+@receiver(post_save, sender=FAQ)
+@receiver(post_delete, sender=FAQ)
+def reload_faq(sender, **kwargs):
+    transaction.on_commit(load_faq)
+
+
+@receiver(post_save, sender=Mailing)
+def schedule_saved_mailing(sender, instance, **kwargs):
+    start_date = None if instance.is_finish else instance.start_date
+    transaction.on_commit(
+        lambda: reschedule_mailing(instance.id, start_date))
+
+
+@receiver(post_delete, sender=Mailing)
+def unschedule_deleted_mailing(sender, instance, **kwargs):
+    mailing_id = instance.id
+    transaction.on_commit(lambda: reschedule_mailing(mailing_id))
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute(f'PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT}')
@@ -0,0 +1,50 @@
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+SUBSCRIPTION_CACHE_SIZE = 100000
+
+
+class SubscriptionCache:
+
+    def __init__(self, member_ttl, non_member_ttl,
+                 max_size=SUBSCRIPTION_CACHE_SIZE):
+        self.member_ttl = member_ttl
+        self.non_member_ttl = non_member_ttl
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+    def get(self, user_id):
+        entry = self.entries.get(user_id)
+        if not entry:
+            return None
+        is_member, expires_at = entry
+        if expires_at < time.monotonic():
+            del self.entries[user_id]
+            return None
+        self.entries.move_to_end(user_id)
+        return is_member
+
+    def set(self, user_id, is_member):
+        ttl = self.member_ttl if is_member else self.non_member_ttl
+        self.entries[user_id] = (is_member, time.monotonic() + ttl)
+        self.entries.move_to_end(user_id)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+
+def is_subscribed(status):
+    return 'left' not in status
+
+
+def is_subscription_channel(chat):
+    channel_id = str(settings.SUBSCRIPTION_CHANNEL_ID)
+    return channel_id in (str(chat.id), f'@{chat.username}')
+
+
+subscriptions = SubscriptionCache(
+    member_ttl=settings.SUBSCRIPTION_MEMBER_TTL,
+    non_member_ttl=settings.SUBSCRIPTION_NON_MEMBER_TTL
+)
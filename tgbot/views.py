@@ -1,3 +1,43 @@
-from django.shortcuts import render
+import hmac
+import json
 
-# Create your views here.
+from django.conf import settings
+from django.http import (
+    HttpResponse,
+    HttpResponseForbidden,
+    HttpResponseNotAllowed,
+)
+from telegram import Update
+
+from tgbot import webhook
+from tgbot.metrics import render_metrics
+
+
+async def telegram_webhook(request):
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    secret_token = request.headers.get('X-Telegram-Bot-Api-Secret-Token', '')
+    if not webhook.application or not settings.TG_WEBHOOK_SECRET:
+        return HttpResponseForbidden()
+    if not hmac.compare_digest(secret_token, settings.TG_WEBHOOK_SECRET):
+        return HttpResponseForbidden()
+    update = Update.de_json(json.loads(request.body), webhook.application.bot)
+    await webhook.application.update_queue.put(update)
+    return HttpResponse()
+
+
+def metrics(request):
+    authorization = request.headers.get('Authorization', '')
+    if not settings.METRICS_TOKEN:
+        return HttpResponseForbidden()
+    if not hmac.compare_digest(
+            authorization, f'Bearer {settings.METRICS_TOKEN}'):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render_metrics(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+# Django 4.0 decorators wrap views in sync functions, so mark it by hand
+telegram_webhook.csrf_exempt = True
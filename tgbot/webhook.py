@@ -0,0 +1,63 @@
+import asyncio
+
+from django.conf import settings
+from telegram import Update
+
+from tgbot.catalog import load_categories
+from tgbot.db import db_read
+from tgbot.faq import load_faq
+
+
+application = None
+loop = None
+
+
+async def start_webhook():
+    global application, loop
+    from tgbot.management.commands.telegram_bot import (build_application,
+                                                        schedule_mailings)
+
+    application = build_application()
+    loop = asyncio.get_running_loop()
+    await db_read(load_categories)()
+    await db_read(load_faq)()
+    await application.initialize()
+    await application.start()
+    application.job_queue.run_once(schedule_mailings, when=0)
+    await application.bot.set_webhook(
+        url=settings.TG_WEBHOOK_URL,
+        secret_token=settings.TG_WEBHOOK_SECRET,
+        allowed_updates=Update.ALL_TYPES
+    )
+
+
+async def stop_webhook():
+    await application.stop()
+    await application.shutdown()
+
+
+def reschedule_mailing(mailing_id, start_date=None):
+    from tgbot.management.commands.telegram_bot import schedule_mailing
+
+    if application is None:
+        return
+    loop.call_soon_threadsafe(
+        schedule_mailing, application.job_queue, mailing_id, start_date)
+
+
+def with_bot_lifespan(django_application):
+
+    async def asgi_application(scope, receive, send):
+        if scope['type'] != 'lifespan':
+            return await django_application(scope, receive, send)
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await start_webhook()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await stop_webhook()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    return asgi_application